@@ -201,6 +201,7 @@ function ChatApplication() {
   const [messages, setMessages] = useState([]);
   const [userInput, setUserInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [streamingReply, setStreamingReply] = useState({ text: '', sources: [] });
   const [error, setError] = useState('');
   const [isSidebarOpen, setIsSidebarOpen] = useState(false);
   const [isProfileMenuOpen, setIsProfileMenuOpen] = useState(false);
@@ -367,6 +368,7 @@ function ChatApplication() {
     if (!user || !sessionId) return;
     setIsLoading(true);
     setError('');
+    setStreamingReply({ text: '', sources: [] });
 
     try {
       await addDoc(collection(db, 'users', user.uid, 'sessions', sessionId, 'messages'), {
@@ -393,15 +395,39 @@ function ChatApplication() {
         throw new Error(errorData.detail || `An API error occurred: ${response.status}`);
       }
 
-      const data = await response.json();
+      // The backend streams NDJSON: a sources line first, then answer text chunks
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      let answer = '';
+      let sources = [];
+
+      const handleLine = (line) => {
+        if (!line.trim()) return;
+        const event = JSON.parse(line);
+        if (event.error) throw new Error(event.error);
+        if (event.sources) sources = event.sources;
+        if (event.text) answer += event.text;
+        setStreamingReply({ text: answer, sources });
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.forEach(handleLine);
+      }
+      handleLine(buffered + decoder.decode());
 
-      const cleanAnswer = removeMarkdown(data.answer);
+      const cleanAnswer = removeMarkdown(answer);
 
 
       await addDoc(collection(db, 'users', user.uid, 'sessions', sessionId, 'messages'), {
         sender: 'bot',
         text: cleanAnswer,
-        sources: data.sources, // Store sources with the message
+        sources: sources, // Store sources with the message
         createdAt: serverTimestamp()
       });
 
@@ -569,7 +595,13 @@ function ChatApplication() {
                                 sources={msg.sources} // Pass sources to Message component
                             />
                         ))}
-                        {isLoading && <Message sender="bot" text={null} />}
+                        {isLoading && (
+                            <Message
+                                sender="bot"
+                                text={streamingReply.text || null}
+                                sources={streamingReply.sources}
+                            />
+                        )}
                       </>
                   )}
                   <div ref={chatEndRef} />
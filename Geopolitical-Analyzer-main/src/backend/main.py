@@ -1,27 +1,71 @@
 import os
+import io
+import sys
 import json
+import queue
+import logging
+import logging.handlers
+import asyncio
+import aiohttp
+from selectolax.lexbor import LexborHTMLParser
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from cachetools import TTLCache
 import re
 import time
-from datetime import datetime, timedelta
+from dataclasses import dataclass, asdict
+import functools
+import heapq
+from operator import itemgetter
+import hashlib
+from contextlib import asynccontextmanager
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.document_loaders import WebBaseLoader
 from langchain_community.tools import DuckDuckGoSearchResults
 from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
 
 
 load_dotenv()
 
+# Records go onto a queue and are written to stdout by a background thread, so
+# request handlers never block on the (possibly pipe-backed) stdout
+logger = logging.getLogger("analyzer")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+log_queue = queue.Queue(-1)
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+_log_output = logging.StreamHandler(sys.stdout)
+_log_output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, _log_output)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    get_process_pool()
+    log_listener.start()
+    get_http_session()
+    yield
+    await close_http_session()
+    shutdown_process_pool()
+    log_listener.stop()
+
+
 app = FastAPI(
     title="LangChain Geopolitical Analyzer API",
     description="Uses DuckDuckGo Search to find articles and Gemini for analysis.",
-    version="12.0.1 (Final)"
+    version="12.0.1 (Final)",
+    lifespan=lifespan
 )
 
 
@@ -45,39 +89,95 @@ class QueryRequest(BaseModel):
     query: str
     chat_history: list = []  # New field for chat history
 
-class SourceItem(BaseModel):
+@dataclass(slots=True)
+class Source:
+    # Built for every kept search result; the fields come straight from the
+    # search response, so there is nothing for pydantic to validate
     title: str
     url: str
 
-class AnalysisResponse(BaseModel):
-    answer: str
-    sources: list[SourceItem]
+# Markdown constructs as (pattern, replacement, characters the construct needs), applied in
+# order: where constructs overlap the earlier pass wins, e.g. "a_b *c_d*" is bold, not
+# italic. A pass is skipped when none of its characters remain, which for typical
+# answers leaves one or two scans. Images run before links so the "!" is dropped too.
+# Every pattern stays within one line ([^\S\n] is whitespace other than a newline), so
+# stripping a streamed answer line by line gives the same text as stripping it whole.
+_MD_PASSES = (
+    (re.compile(r'^[^\S\n]*#+[^\S\n]+', re.MULTILINE), '', '#'),
+    (re.compile(r'\*{1,2}(.*?)\*{1,2}'), r'\1', '*'),
+    (re.compile(r'_{1,2}(.*?)_{1,2}'), r'\1', '_'),
+    (re.compile(r'`{1,3}(.*?)`{1,3}'), r'\1', '`'),
+    (re.compile(r'!\[(.*?)\]\(.*?\)'), r'\1', '['),
+    (re.compile(r'\[(.*?)\]\(.*?\)'), r'\1', '['),
+    (re.compile(r'^[^\S\n]*>+[^\S\n]+', re.MULTILINE), '', '>'),
+    (re.compile(r'^[^\S\n]*[-*_]{3,}[^\S\n]*$', re.MULTILINE), '', '-*_'),
+)
+# Every construct above needs one of these characters (a "---" rule is the only one
+# built purely from '-'), so text without them can skip the regex engine entirely.
+_MD_MARKERS = ('#', '*', '_', '`', '[', '>')
+
+
+def has_markdown(text):
+    """Cheap check for characters that could start a markdown construct"""
+    return any(marker in text for marker in _MD_MARKERS) or '---' in text
+
+
+def strip_markdown(text):
+    """Remove markdown formatting from text, leaving surrounding whitespace intact"""
+    # The prompt asks for plain text, so most answers take this path
+    if not text or not has_markdown(text):
+        return text
+    for pattern, replacement, markers in _MD_PASSES:
+        if any(marker in text for marker in markers):
+            text = pattern.sub(replacement, text)
+    return text
+
 
 def remove_markdown(text):
     """Remove markdown formatting from text"""
     if not text:
         return text
 
-    # Remove headers
-    text = re.sub(r'#+\s+', '', text)
-    # Remove bold and italic
-    text = re.sub(r'\*{1,2}(.*?)\*{1,2}', r'\1', text)
-    text = re.sub(r'_{1,2}(.*?)_{1,2}', r'\1', text)
-    # Remove code blocks
-    text = re.sub(r'`{1,3}(.*?)`{1,3}', r'\1', text)
-    # Remove links
-    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-    # Remove images
-    text = re.sub(r'!\[(.*?)\]\(.*?\)', r'\1', text)
-    # Remove blockquotes
-    text = re.sub(r'^\s*>+\s+', '', text, flags=re.MULTILINE)
-    # Remove horizontal rules
-    text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
-
-    return text.strip()
-
-def get_langchain_analyzer():
-    """Initializes and returns a LangChain chain for analysis."""
+    return strip_markdown(text).strip()
+
+
+async def remove_markdown_stream(chunks):
+    """Remove markdown from streamed text, flushing one batch of complete lines at a time"""
+    buffer = ""
+    # Trailing whitespace is held back until more text follows, so the joined
+    # output is stripped the same way remove_markdown strips a full answer
+    pending_whitespace = ""
+    started = False
+
+    def flush(text):
+        nonlocal pending_whitespace, started
+        text = strip_markdown(text)
+        if not started:
+            text = text.lstrip()
+        content = text.rstrip()
+        if not content:
+            pending_whitespace += text
+            return ""
+        started = True
+        output = pending_whitespace + content
+        pending_whitespace = text[len(content):]
+        return output
+
+    async for chunk in chunks:
+        buffer += chunk
+        complete, newline, buffer = buffer.rpartition("\n")
+        if newline:
+            text = flush(complete + newline)
+            if text:
+                yield text
+
+    text = flush(buffer)
+    if text:
+        yield text
+
+@functools.lru_cache(maxsize=1)
+def get_analyzer_chain():
+    """Initializes and returns a LangChain chain for analysis, built on first use."""
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY not found in environment variables.")
@@ -104,18 +204,42 @@ def get_langchain_analyzer():
     return chain
 
 
-try:
-    if not os.getenv("GOOGLE_API_KEY"):
-        raise ValueError("GOOGLE_API_KEY not found in .env file.")
-
-    analyzer_chain = get_langchain_analyzer()
+@functools.lru_cache(maxsize=1)
+def get_search_tool():
+    """Initializes and returns the DuckDuckGo search tool, built on first use."""
     wrapper = DuckDuckGoSearchAPIWrapper(max_results=12)
-    search_tool = DuckDuckGoSearchResults(api_wrapper=wrapper, output_format="list")
+    return DuckDuckGoSearchResults(api_wrapper=wrapper, output_format="list")
+
 
-except ValueError as e:
-    analyzer_chain = None
-    search_tool = None
-    print(f"InitializationError: {e}")
+SEARCH_CACHE_SIZE = 512
+SEARCH_CACHE_TTL_SECONDS = 300
+
+search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL_SECONDS)
+# In-flight searches by cache key, so concurrent identical queries share one upstream call
+pending_searches = {}
+
+
+async def cached_search(search_tool, query):
+    """Run a web search, reusing results from the last few minutes"""
+    key = query.lower().strip()
+    results = search_cache.get(key)
+    if results is not None:
+        return results
+
+    task = pending_searches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(search_tool.ainvoke(query))
+        pending_searches[key] = task
+        task.add_done_callback(lambda _: pending_searches.pop(key, None))
+
+    # Shielded so one client disconnecting doesn't cancel the search for the others
+    results = await asyncio.shield(task)
+    if results and isinstance(results, list):
+        search_cache[key] = results
+    return results
+
+
+CHAT_HISTORY_LIMIT = 10
 
 
 def format_chat_history(chat_history):
@@ -123,208 +247,536 @@ def format_chat_history(chat_history):
     if not chat_history:
         return "No previous conversation."
 
-    formatted_history = []
-    for i, message in enumerate(chat_history):
-        if isinstance(message, dict):
-            sender = "User" if message.get("sender") == "user" else "Assistant"
-            text = message.get("text", "")
-            formatted_history.append(f"{sender}: {text}")
-        else:
-            formatted_history.append(str(message))
+    recent_messages = chat_history[-CHAT_HISTORY_LIMIT:]  # Keep last 10 messages to avoid token limits
+    return "\n".join(
+        f"{'User' if message.get('sender') == 'user' else 'Assistant'}: {message.get('text', '')}"
+        if isinstance(message, dict) else str(message)
+        for message in recent_messages
+    )
 
-    return "\n".join(formatted_history[-10:])  # Keep last 10 messages to avoid token limits
 
+ANALYSIS_CACHE_SIZE = 256
+# Answers summarize the latest news, so they expire well before the cached pages behind them
+ANALYSIS_CACHE_TTL_SECONDS = 900
+ANALYSIS_CACHE_MIN_URL_OVERLAP = 0.5  # Share of current URLs the cached answer must have been built from
 
-def enhance_search_query(query, chat_history):
-    """Enhance the search query to get more recent and relevant results, considering chat history"""
-    enhanced_query = query
+# Words ignored when deciding whether two questions ask the same thing
+QUESTION_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'what', 'whats', 'who', 'how',
+    'of', 'in', 'on', 'for', 'to', 'at', 'and', 'or', 'me', 'tell', 'about', 'please', 's'
+})
+
+# (history digest, url-set digest, question words) -> (url set, answer, sources)
+analysis_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL_SECONDS)
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
 
-    current_year = datetime.now().year
+def _question_words(query):
+    words = set(re.findall(r'\w+', query.lower())) - QUESTION_STOPWORDS
+    return " ".join(sorted(words))
 
+
+def _analysis_cache_key(query, urls, formatted_history):
+    return (_digest(formatted_history), _digest("\n".join(sorted(set(urls)))), _question_words(query))
+
+
+def lookup_cached_analysis(query, urls, formatted_history):
+    """Return a stored (answer, sources) for the same question over the same or overlapping sources"""
+    # Questions match only when their words are identical apart from stopwords and
+    # order, so "gold price in india today" never matches "gold price in china today"
+    key = _analysis_cache_key(query, urls, formatted_history)
+    entry = analysis_cache.get(key)
+    if entry is not None:
+        return entry[1], entry[2]
+
+    url_set = set(urls)
+    if not key[2] or not url_set:
+        return None
+
+    for cached_key, (cached_urls, answer, sources) in list(analysis_cache.items()):
+        # Answers depend on the conversation so far, so only match within the same history
+        if cached_key[0] != key[0] or cached_key[2] != key[2]:
+            continue
+        if len(url_set & cached_urls) / len(url_set) >= ANALYSIS_CACHE_MIN_URL_OVERLAP:
+            return answer, sources
+
+    return None
+
+
+def store_cached_analysis(query, urls, formatted_history, answer, sources):
+    """Remember an answer together with the sources it was built from"""
+    key = _analysis_cache_key(query, urls, formatted_history)
+    analysis_cache[key] = (frozenset(urls), answer, sources)
+
+
+# Query word -> category, for picking how to enhance the search. Terms are singular
+# (plurals fall back to them) and "prime minister" is keyed on "minister".
+TERM_CATEGORY = {
+    **{term: 'economic' for term in (
+        'price', 'gold', 'silver', 'oil', 'stock', 'market', 'currency', 'dollar', 'euro', 'inflation'
+    )},
+    **{term: 'political' for term in (
+        'election', 'government', 'president', 'minister', 'war', 'conflict', 'treaty', 'sanction'
+    )},
+}
+
+# Extra search terms by (category, is_follow_up)
+SEARCH_SUFFIXES = {
+    ('economic', False): "latest today current market news financial update",
+    ('economic', True): "latest update current market news",
+    ('political', False): "latest update current affairs geopolitical analysis",
+    ('political', True): "latest developments update",
+    ('general', False): "latest news update today current",
+    ('general', True): "latest update",
+}
+
+# Trusted domains for geopolitical and economic analysis
+TRUSTED_DOMAINS = frozenset({
+    'reuters.com', 'bloomberg.com', 'ft.com', 'wsj.com', 'economist.com',
+    'foreignpolicy.com', 'foreignaffairs.com', 'carnegieendowment.org',
+    'brookings.edu', 'csis.org', 'cfr.org', 'rand.org', 'stratfor.com',
+    'aljazeera.com', 'bbc.com', 'cnn.com', 'theguardian.com',
+    'apnews.com', 'politico.com', 'axios.com', 'defenseone.com',
+    'nationalinterest.org', 'warontherocks.com', 'lawfareblog.com',
+    'cnbc.com', 'marketwatch.com', 'investing.com', 'kitco.com',
+    'scmp.com', 'in.investing.com', 'moneycontrol.com', 'globaltimes.cn'
+})
+
+# Obviously irrelevant domains for news analysis
+IRRELEVANT_DOMAINS = frozenset({
+    'wikipedia.org', 'whatsapp.com', 'facebook.com', 'twitter.com',
+    'youtube.com', 'instagram.com', 'tiktok.com', 'google.com',
+    'apps.microsoft.com', 'play.google.com', 'reddit.com',
+    'quora.com', 'pinterest.com'
+})
+
+# Single-word time indicators are matched against title words, phrases as substrings
+RECENT_KEYWORDS = frozenset({
+    'today', 'latest', 'current', 'recent', 'update', 'just', 'new', 'breaking', 'live'
+})
+RECENT_PHRASES = ('this week', 'this month')
+
+# Both domain lists in one lookup table so each host is walked only once
+DOMAIN_CLASSES = {
+    **{domain: 'trusted' for domain in TRUSTED_DOMAINS},
+    **{domain: 'irrelevant' for domain in IRRELEVANT_DOMAINS},
+}
+
+_WORD = re.compile(r'\w+')
+
+
+@functools.lru_cache(maxsize=1)
+def _today_tokens(hour_bucket):
+    now = datetime.now()
+    return str(now.year), now.strftime("%B").lower()
+
+
+def today_tokens():
+    """Current year and lowercase month name, recomputed at most once an hour"""
+    return _today_tokens(int(time.time() // 3600))
+
+
+@functools.lru_cache(maxsize=1)
+def recent_keywords_for(today):
+    """Recency keywords plus the current year and month"""
+    return RECENT_KEYWORDS | frozenset(today)
+
+
+def classify_domain(host):
+    """Return 'trusted' or 'irrelevant' if the host (or a parent domain) is listed, else None"""
+    labels = host.split('.')
+    for i in range(len(labels) - 1):
+        domain_class = DOMAIN_CLASSES.get('.'.join(labels[i:]))
+        if domain_class:
+            return domain_class
+    return None
+
+
+def query_category(query):
+    """Classify a query as 'political', 'economic' or 'general' from its words"""
+    categories = set()
+    for word in _WORD.findall(query.lower()):
+        category = TERM_CATEGORY.get(word)
+        if category is None and word.endswith('s'):
+            category = TERM_CATEGORY.get(word[:-1])
+        if category:
+            categories.add(category)
+
+    # Political context wins when a query touches both
+    for category in ('political', 'economic'):
+        if category in categories:
+            return category
+    return 'general'
+
+
+def enhance_search_query(query, chat_history):
+    """Enhance the search query to get more recent and relevant results, considering chat history"""
+    current_year, _ = today_tokens()
     is_follow_up = len(chat_history) > 0
+    suffix = SEARCH_SUFFIXES[query_category(query), is_follow_up]
+    return f"{query} {current_year} {suffix}"
 
-    # For economic queries like gold prices, add financial context and recency
-    economic_terms = ['price', 'gold', 'silver', 'oil', 'stock', 'market', 'currency', 'dollar', 'euro', 'inflation']
-    if any(term in query.lower() for term in economic_terms):
-        if is_follow_up:
-            enhanced_query = f"{query} {current_year} latest update current market news"
-        else:
-            enhanced_query = f"{query} {current_year} latest today current market news financial update"
 
-    # For political queries, add geopolitical context and recency
-    political_terms = ['election', 'government', 'president', 'prime minister', 'war', 'conflict', 'treaty', 'sanctions']
-    if any(term in query.lower() for term in political_terms):
-        if is_follow_up:
-            enhanced_query = f"{query} {current_year} latest developments update"
-        else:
-            enhanced_query = f"{query} {current_year} latest update current affairs geopolitical analysis"
+MAX_SOURCES = 6
 
-    # For general queries, add news context and recency
-    if enhanced_query == query:
-        if is_follow_up:
-            enhanced_query = f"{query} {current_year} latest update"
-        else:
-            enhanced_query = f"{query} {current_year} latest news update today current"
 
-    return enhanced_query
+def extract_query_terms(query):
+    """Significant lowercase words of a query, used to score titles and documents"""
+    return frozenset(term for term in _WORD.findall(query.lower()) if len(term) > 3)
 
 
-def filter_recent_sources(results, original_query):
+def filter_recent_sources(results, query_terms):
     """Filter and prioritize recent sources based on time indicators"""
-    relevant_sources = []
-
-    # List of trusted domains for geopolitical and economic analysis
-    trusted_domains = [
-        'reuters.com', 'bloomberg.com', 'ft.com', 'wsj.com', 'economist.com',
-        'foreignpolicy.com', 'foreignaffairs.com', 'carnegieendowment.org',
-        'brookings.edu', 'csis.org', 'cfr.org', 'rand.org', 'stratfor.com',
-        'aljazeera.com', 'bbc.com', 'cnn.com', 'theguardian.com',
-        'apnews.com', 'politico.com', 'axios.com', 'defenseone.com',
-        'nationalinterest.org', 'warontherocks.com', 'lawfareblog.com',
-        'cnbc.com', 'marketwatch.com', 'investing.com', 'kitco.com',
-        'scmp.com','in.investing.com','moneycontrol.com','globaltimes.cn'
-    ]
-
-    recent_keywords = [
-        'today', 'latest', 'current', 'recent', 'update', 'just', 'new',
-        'this week', 'this month', str(datetime.now().year),
-        datetime.now().strftime("%B"), 'breaking', 'live'
-    ]
-
-    for res in results:
-        if not res.get("link") or not res.get("title"):
-            continue
+    recent_keywords = recent_keywords_for(today_tokens())
 
-        url = res["link"].lower()
-        title = res["title"].lower()
+    def scored_sources():
+        for res in results:
+            if not res.get("link") or not res.get("title"):
+                continue
 
-        # Skip obviously irrelevant domains
-        irrelevant_domains = ['wikipedia.org', 'whatsapp.com', 'facebook.com', 'twitter.com',
-                             'youtube.com', 'instagram.com', 'tiktok.com', 'google.com',
-                             'apps.microsoft.com', 'play.google.com', 'reddit.com',
-                             'quora.com', 'pinterest.com']
+            url = res["link"].lower()
+            title = res["title"].lower()
+            domain_class = classify_domain(urlparse(url).hostname or "")
 
-        if any(domain in url for domain in irrelevant_domains):
-            continue
+            # Skip obviously irrelevant domains
+            if domain_class == 'irrelevant':
+                continue
+
+            is_trusted = domain_class == 'trusted'
+            title_words = set(_WORD.findall(title))
+            appears_recent = bool(title_words & recent_keywords) or any(phrase in title for phrase in RECENT_PHRASES)
+
+            recency_score = 0
+            if is_trusted:
+                recency_score += 3
+            if appears_recent:
+                recency_score += 2
+
+            if title_words & query_terms:
+                recency_score += 1
+
+            if recency_score >= 2:
+                yield res, recency_score
+
+    # Keeps only the best few in a small heap rather than sorting every candidate
+    top_sources = heapq.nlargest(MAX_SOURCES, scored_sources(), key=itemgetter(1))
+    return [Source(title=res["title"], url=res["link"]) for res, _ in top_sources]
+
+
+FETCH_TIMEOUT_SECONDS = 10
+MAX_CHARS_PER_DOC = 8000
+FETCH_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    )
+}
+
+HTTP_POOL_SIZE = 32
+
+# Shared across requests so repeat hosts reuse their TCP/TLS connections
+http_session = None
+
+
+def get_http_session():
+    """Return the pooled HTTP session, creating it if needed"""
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            headers=FETCH_HEADERS,
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE),
+        )
+    return http_session
 
 
-        is_trusted = any(domain in url for domain in trusted_domains)
-        appears_recent = any(keyword in title for keyword in recent_keywords)
+async def close_http_session():
+    global http_session
+    if http_session is not None:
+        await http_session.close()
+        http_session = None
 
-        recency_score = 0
-        if is_trusted:
-            recency_score += 3
-        if appears_recent:
-            recency_score += 2
 
-        query_terms = original_query.lower().split()
-        has_query_terms = any(term in title for term in query_terms if len(term) > 3)
+# HTML parsing is CPU-bound, so it runs in worker processes to keep it off the
+# event loop and let concurrent requests use more than one core. os.cpu_count()
+# reports the host's cores rather than the container's CPU quota, so the pool is capped.
+DEFAULT_PARSE_WORKERS = 2
 
-        if has_query_terms:
-            recency_score += 1
 
-        if recency_score >= 2:
-            relevant_sources.append((res, recency_score))
+def parse_worker_count():
+    """Worker count from PARSE_WORKERS, falling back to the default on a bad value"""
+    value = os.getenv("PARSE_WORKERS", "")
+    try:
+        workers = int(value) if value else DEFAULT_PARSE_WORKERS
+    except ValueError:
+        logger.warning("Ignoring invalid PARSE_WORKERS=%r, using %d", value, DEFAULT_PARSE_WORKERS)
+        workers = DEFAULT_PARSE_WORKERS
+    return max(1, min(workers, os.cpu_count() or 1))
+
+
+PARSE_WORKERS = parse_worker_count()
+
+process_pool = None
+
+
+def get_process_pool():
+    """Return the worker pool for CPU-bound work, creating it if needed"""
+    global process_pool
+    if process_pool is None:
+        # Workers come from a forkserver rather than forking this process, which by
+        # now runs the log listener, executor threads and the Gemini client. Platforms
+        # without forkserver (Windows) use their default, which already avoids fork.
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+        process_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context(start_method),
+        )
+    return process_pool
+
+
+def reset_process_pool(broken_pool):
+    """Drop a pool whose worker died so the next call starts a fresh one"""
+    global process_pool
+    if process_pool is broken_pool:
+        process_pool = None
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool():
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures=True)
+        process_pool = None
+
+
+NON_TEXT_TAGS = ["script", "style", "noscript", "svg"]
+
+
+def extract_text(html):
+    """Extract the visible body text from an HTML page, cut to what the prompt can use"""
+    tree = LexborHTMLParser(html)
+    if tree.body is None:
+        return ""
+    # Inline JS/CSS would otherwise eat the per-document character budget
+    tree.strip_tags(NON_TEXT_TAGS)
+    # Only the first MAX_CHARS_PER_DOC characters are ever scored or sent to Gemini, so
+    # cutting here keeps both the worker's reply and the page cache small
+    return tree.body.text(separator=" ", strip=True)[:MAX_CHARS_PER_DOC]
+
+
+async def extract_text_in_pool(html):
+    """Run extract_text in the worker pool, replacing the pool once if a worker died"""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    try:
+        return await loop.run_in_executor(pool, extract_text, html)
+    except BrokenProcessPool:
+        logger.warning("Text extraction pool is broken, starting a new one")
+        reset_process_pool(pool)
+        return await loop.run_in_executor(get_process_pool(), extract_text, html)
+
+
+async def fetch_document(session, url):
+    """Fetch a single URL and extract its text, returning None if it fails"""
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS)) as response:
+            response.raise_for_status()
+            html = await response.text()
+    except Exception as e:
+        logger.warning("Failed to load %s: %s", url, e)
+        return None
+
+    try:
+        text = await extract_text_in_pool(html)
+    except Exception as e:
+        logger.warning("Failed to extract text from %s: %s", url, e)
+        return None
+    if not text:
+        return None
+    return {"source": url, "page_content": text}
+
+
+PAGE_CACHE_SIZE = 5000
+PAGE_CACHE_TTL_SECONDS = 3600
+TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ocid', 'cmpid'})
 
-    relevant_sources.sort(key=lambda x: x[1], reverse=True)
+# Extracted page text by canonical URL, so articles that surface for many queries are fetched once
+page_cache = TTLCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL_SECONDS)
 
-    return [source[0] for source in relevant_sources[:6]]
+
+def canonical_url(url):
+    """Normalize a URL for caching by dropping the fragment and tracking parameters"""
+    parts = urlsplit(url)
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+
+async def load_documents(urls):
+    """Load all URLs, fetching uncached ones concurrently and skipping any that fail"""
+    docs = {}
+    misses = []
+    for url in urls:
+        text = page_cache.get(canonical_url(url))
+        if text is not None:
+            docs[url] = {"source": url, "page_content": text}
+        else:
+            misses.append(url)
+
+    if misses:
+        session = get_http_session()
+        fetched = await asyncio.gather(*[fetch_document(session, url) for url in misses])
+        for url, doc in zip(misses, fetched):
+            if doc is not None:
+                page_cache[canonical_url(url)] = doc["page_content"]
+                docs[url] = doc
+
+    logger.info("Loaded %d pages from cache, fetched %d", len(urls) - len(misses), len(misses))
+    return [docs[url] for url in urls if url in docs]
+
+
+MAX_CONTEXT_CHARS = 60_000
+ARTICLE_SEPARATOR = "\n\n--- Next Article ---\n\n"
+
+
+def build_context(docs, query_terms):
+    """Join the most query-relevant documents into a prompt context of bounded size"""
+
+    def relevance(doc):
+        words = set(_WORD.findall(doc["page_content"][:MAX_CHARS_PER_DOC].lower()))
+        return len(query_terms & words)
+
+    context = io.StringIO()
+    for i, doc in enumerate(sorted(docs, key=relevance, reverse=True)):
+        header = f"Source: {doc['source']}\n\n"
+        if i:
+            header = ARTICLE_SEPARATOR + header
+        budget = MAX_CONTEXT_CHARS - context.tell() - len(header)
+        if budget <= 0:
+            break
+        context.write(header)
+        context.write(doc["page_content"][:min(MAX_CHARS_PER_DOC, budget)])
+
+    return context.getvalue()
 
 
 # --- API Endpoints ---
-@app.post("/analyze", response_model=AnalysisResponse)
-def analyze_from_web_search(request: QueryRequest):
-    if not analyzer_chain or not search_tool:
+def ndjson_line(payload):
+    return json.dumps(payload) + "\n"
+
+
+@app.post("/analyze")
+async def analyze_from_web_search(request: QueryRequest):
+    try:
+        analyzer_chain = get_analyzer_chain()
+        search_tool = get_search_tool()
+    except ValueError as e:
+        logger.error("InitializationError: %s", e)
         raise HTTPException(
             status_code=500,
             detail="API is not initialized. Please check backend .env file and console for errors."
         )
 
-    print(f"Original query: '{request.query}'")
-    print(f"Chat history length: {len(request.chat_history)}")
+    logger.info("Original query: '%s'", request.query)
+    logger.info("Chat history length: %d", len(request.chat_history))
 
 
     formatted_history = format_chat_history(request.chat_history)
+    query_terms = extract_query_terms(request.query)
 
     enhanced_query = enhance_search_query(request.query, request.chat_history)
-    print(f"Enhanced search query: '{enhanced_query}'")
+    logger.info("Enhanced search query: '%s'", enhanced_query)
 
     try:
-        results = search_tool.invoke(enhanced_query)
+        results = await cached_search(search_tool, enhanced_query)
         if not results or not isinstance(results, list):
              raise ValueError("DuckDuckGo search returned an invalid or empty response.")
 
-        print(f"Found {len(results)} initial results")
-
+        logger.info("Found %d initial results", len(results))
 
-        filtered_results = filter_recent_sources(results, request.query)
-        print(f"After filtering: {len(filtered_results)} recent relevant results")
 
+        sources = filter_recent_sources(results, query_terms)
+        logger.info("After filtering: %d recent relevant results", len(sources))
 
-        sources = []
-        urls = []
-        for res in filtered_results:
-            if res.get("link") and res.get("title"):
-                sources.append(SourceItem(title=res["title"], url=res["link"]))
-                urls.append(res["link"])
-                print(f"  - {res['title']}")
+        urls = [source.url for source in sources]
+        for source in sources:
+            logger.info("  - %s", source.title)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search function failed: {e}")
 
     if not urls:
-        print("No relevant recent sources found, trying alternative search...")
+        logger.info("No relevant recent sources found, trying alternative search...")
         try:
-            current_year = datetime.now().year
+            current_year, _ = today_tokens()
             alternative_query = f"{request.query} {current_year} latest news today"
-            results = search_tool.invoke(alternative_query)
-            filtered_results = filter_recent_sources(results, request.query)
+            results = await cached_search(search_tool, alternative_query)
+            sources = filter_recent_sources(results, query_terms)
+            urls = [source.url for source in sources]
 
-            sources = []
-            urls = []
-            for res in filtered_results:
-                if res.get("link") and res.get("title"):
-                    sources.append(SourceItem(title=res["title"], url=res["link"]))
-                    urls.append(res["link"])
-
-            print(f"Alternative search found {len(urls)} sources")
+            logger.info("Alternative search found %d sources", len(urls))
         except Exception as e:
             raise HTTPException(status_code=404, detail="Could not find recent information for this query. Please try rephrasing or check if this is a current topic.")
 
     if not urls:
         raise HTTPException(status_code=404, detail="Web search found no recent relevant URLs for the query. Try rephrasing your question to be more specific about current information.")
 
-    print(f"Using {len(urls)} URLs for analysis: {urls}")
+    logger.info("Using %d URLs for analysis: %s", len(urls), urls)
+
+    cached = lookup_cached_analysis(request.query, urls, formatted_history)
+    if cached is not None:
+        logger.info("Returning cached analysis.")
+        cached_answer, cached_sources = cached
+
+        async def stream_cached():
+            # The cited sources are the ones the cached answer was written from
+            yield ndjson_line({"sources": [asdict(source) for source in cached_sources]})
+            yield ndjson_line({"text": cached_answer})
+
+        return StreamingResponse(stream_cached(), media_type="application/x-ndjson")
 
     try:
-        loader = WebBaseLoader(web_paths=urls, continue_on_failure=True)
-        docs = loader.load()
+        docs = await load_documents(urls)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load content from URLs: {e}")
 
     if not docs:
         raise HTTPException(status_code=500, detail="Web content loader failed to extract any text from the found URLs.")
 
-    combined_context = "\n\n--- Next Article ---\n\n".join(
-        [f"Source: {doc.metadata.get('source', 'N/A')}\n\n{doc.page_content}" for doc in docs]
-    )
+    combined_context = build_context(docs, query_terms)
+    sources_line = ndjson_line({"sources": [asdict(source) for source in sources]})
 
-    print("Sending content to Gemini for analysis...")
-    try:
-        analysis_result = analyzer_chain.invoke({
-            "context": combined_context,
-            "chat_history": formatted_history,
-            "query": request.query
-        })
+    # The response is NDJSON: a {"sources": [...]} line first, then {"text": ...} lines
+    # as the answer streams in, or an {"error": ...} line if analysis fails midway.
+    async def stream_analysis():
+        yield sources_line
 
-        clean_result = remove_markdown(analysis_result)
+        logger.info("Sending content to Gemini for analysis...")
+        answer = io.StringIO()
+        try:
+            chunks = analyzer_chain.astream({
+                "context": combined_context,
+                "chat_history": formatted_history,
+                "query": request.query
+            })
+            async for text in remove_markdown_stream(chunks):
+                answer.write(text)
+                yield ndjson_line({"text": text})
+        except Exception as e:
+            logger.error("Error during LangChain invocation: %s", e)
+            yield ndjson_line({"error": f"An error occurred during AI analysis: {str(e)}"})
+            return
 
-        print("Analysis complete.")
-        return AnalysisResponse(answer=clean_result, sources=sources)
-    except Exception as e:
-        print(f"Error during LangChain invocation: {e}")
-        raise HTTPException(status_code=500, detail=f"An error occurred during AI analysis: {str(e)}")
+        # An empty stream would otherwise be served to every later identical question
+        if answer.getvalue():
+            store_cached_analysis(request.query, urls, formatted_history, answer.getvalue(), sources)
+        logger.info("Analysis complete.")
+
+    return StreamingResponse(stream_analysis(), media_type="application/x-ndjson")
 
 
 @app.get("/")
@@ -0,0 +1,51 @@
+import asyncio
+import random
+
+import pytest
+
+from main import remove_markdown, remove_markdown_stream
+
+
+async def _chunks(parts):
+    for part in parts:
+        yield part
+
+
+def _stream(parts):
+    async def collect():
+        return "".join([text async for text in remove_markdown_stream(_chunks(parts))])
+    return asyncio.run(collect())
+
+
+def _splits(text, rng):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 6))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("## Title\n\nSome **bold** and _italic_ text", "Title\n\nSome bold and italic text"),
+    ("See [Reuters](https://reuters.com) and ![chart](c.png)", "See Reuters and chart"),
+    ("> quoted\n***\nplain", "quoted\n\nplain"),
+    ("a_b *c_d* e_f", "ab cd e_f"),
+    ("Intro\n\n---\n\nNext", "Intro\n\n\n\nNext"),
+])
+def test_remove_markdown(text, expected):
+    assert remove_markdown(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Intro\n\n---\n\nNext",
+    "*#\n-_",
+    "\n\n  # Title\n\nSome **bold** and *it*\n\n> quote\nplain end  \n\n",
+])
+def test_stream_matches_whole_text_for_every_split(text):
+    for cut in range(len(text) + 1):
+        assert _stream([text[:cut], text[cut:]]) == remove_markdown(text)
+
+
+def test_stream_matches_whole_text_for_random_input():
+    rng = random.Random(0)
+    alphabet = "ab #*_`[]()!>-\n \t"
+    for _ in range(20000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        assert _stream(_splits(text, rng)) == remove_markdown(text), repr(text)